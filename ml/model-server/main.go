@@ -68,52 +68,105 @@ func (sc *scaler) validate() error {
 	return nil
 }
 
-func (sc *scaler) normalize(features []float32) []float32 {
-	out := make([]float32, len(features))
+// normalize writes the standardised features into dst, which must have the
+// same length as features.
+func (sc *scaler) normalize(dst, features []float32) {
 	for i, f := range features {
 		if sc.Scale[i] == 0 {
-			out[i] = 0
+			dst[i] = 0
 			continue
 		}
-		out[i] = (f - sc.Mean[i]) / sc.Scale[i]
+		dst[i] = (f - sc.Mean[i]) / sc.Scale[i]
 	}
-	return out
 }
 
 // ─── Model Server ─────────────────────────────────────────────────────────────
 
 type modelServer struct {
 	cfg     serverConfig
-	sc      scaler
+	sc      *scaler // nil when normalisation is built into the model
 	session *ort.DynamicAdvancedSession
 	mu      sync.RWMutex
-	loaded  bool // true only when model + scaler are ready
+	loaded  bool // true only when the model (and scaler, if any) is ready
 }
 
-// newModelServer attempts to load the model and scaler.
-// Returns (nil, err) if files are missing — caller should start in degraded mode.
-// Returns (nil, err) with a descriptive error for any other failure.
-func newModelServer(cfg serverConfig) (*modelServer, error) {
-	ms := &modelServer{cfg: cfg}
+// Models exported by ml/training/train_model.py carry this ONNX metadata_props
+// entry when the StandardScaler is folded into the graph.
+// Keep in sync with NORMALIZATION_KEY / NORMALIZATION_IN_GRAPH there.
+const (
+	normalizationKey = "normalization"
+	inGraph          = "in_graph"
+)
 
-	// Check files exist before touching ONNX runtime
-	for _, path := range []string{cfg.ModelPath, cfg.ScalerPath} {
-		if _, err := os.Stat(path); err != nil {
-			return nil, fmt.Errorf("required file missing %q: %w", path, err)
-		}
+// loadScaler reads and validates scaler.json. A missing file is not an error
+// and yields a nil scaler.
+func loadScaler(path string) (*scaler, error) {
+	raw, err := os.ReadFile(path)
+	if errors.Is(err, os.ErrNotExist) {
+		return nil, nil
 	}
-
-	// Load scaler
-	raw, err := os.ReadFile(cfg.ScalerPath)
 	if err != nil {
 		return nil, fmt.Errorf("read scaler: %w", err)
 	}
-	if err := json.Unmarshal(raw, &ms.sc); err != nil {
+	sc := &scaler{}
+	if err := json.Unmarshal(raw, sc); err != nil {
 		return nil, fmt.Errorf("parse scaler: %w", err)
 	}
-	if err := ms.sc.validate(); err != nil {
+	if err := sc.validate(); err != nil {
 		return nil, fmt.Errorf("invalid scaler: %w", err)
 	}
+	return sc, nil
+}
+
+// resolveScaler returns the scaler to apply before inference: nil for a model
+// that normalises its own inputs (fused), otherwise the scaler at path, which
+// must exist.
+func resolveScaler(fused bool, path string) (*scaler, error) {
+	if fused {
+		if _, err := os.Stat(path); err == nil {
+			log.Printf("ignoring %s — model normalises its own inputs", path)
+		}
+		return nil, nil
+	}
+	sc, err := loadScaler(path)
+	if err != nil {
+		return nil, err
+	}
+	// An unmarked model was trained on standardised inputs; scoring raw
+	// features with it would give silently wrong results.
+	if sc == nil {
+		return nil, fmt.Errorf("required file missing %q: model is not marked %s=%s",
+			path, normalizationKey, inGraph)
+	}
+	return sc, nil
+}
+
+// normalizesInputs reports whether the model at path is marked as applying
+// its own input standardisation. Requires an initialised ONNX environment.
+func normalizesInputs(path string) (bool, error) {
+	meta, err := ort.GetModelMetadata(path)
+	if err != nil {
+		return false, err
+	}
+	defer meta.Destroy()
+	v, ok, err := meta.LookupCustomMetadataMap(normalizationKey)
+	if err != nil {
+		return false, err
+	}
+	return ok && v == inGraph, nil
+}
+
+// newModelServer attempts to load the model and, unless the model normalises
+// its own inputs, the scaler.
+// Returns (nil, err) if files are missing — caller should start in degraded mode.
+// Returns (nil, err) with a descriptive error for any other failure.
+func newModelServer(cfg serverConfig) (*modelServer, error) {
+	ms := &modelServer{cfg: cfg}
+
+	// Check the model exists before touching ONNX runtime
+	if _, err := os.Stat(cfg.ModelPath); err != nil {
+		return nil, fmt.Errorf("required file missing %q: %w", cfg.ModelPath, err)
+	}
 
 	// Init ONNX runtime
 	ort.SetSharedLibraryPath(cfg.OnnxLibPath)
@@ -121,6 +174,20 @@ func newModelServer(cfg serverConfig) (*modelServer, error) {
 		return nil, fmt.Errorf("onnx init: %w", err)
 	}
 
+	// Current models normalise inside the graph; applying scaler.json on top
+	// of that would standardise the inputs twice, so it is only loaded for
+	// older unmarked models.
+	fused, err := normalizesInputs(cfg.ModelPath)
+	if err != nil {
+		_ = ort.DestroyEnvironment()
+		return nil, fmt.Errorf("read model metadata: %w", err)
+	}
+	ms.sc, err = resolveScaler(fused, cfg.ScalerPath)
+	if err != nil {
+		_ = ort.DestroyEnvironment()
+		return nil, err
+	}
+
 	opts, err := ort.NewSessionOptions()
 	if err != nil {
 		_ = ort.DestroyEnvironment()
@@ -147,23 +214,36 @@ func newModelServer(cfg serverConfig) (*modelServer, error) {
 	return ms, nil
 }
 
-func (ms *modelServer) predict(features []float32) (float32, error) {
+// predict scores all feature rows with a single session run. Rows are packed
+// into one (n, expectedFeatures) input tensor so a request costs one ONNX
+// Runtime call regardless of how many servers it contains.
+func (ms *modelServer) predict(rows [][]float32) ([]float32, error) {
 	ms.mu.RLock()
 	defer ms.mu.RUnlock()
 
-	norm := ms.sc.normalize(features)
-	shape := ort.NewShape(1, int64(len(norm)))
+	n := len(rows)
+	input := make([]float32, n*expectedFeatures)
+	for i, feats := range rows {
+		if len(feats) != expectedFeatures {
+			return nil, fmt.Errorf("row %d has %d features, expected %d", i, len(feats), expectedFeatures)
+		}
+		dst := input[i*expectedFeatures : (i+1)*expectedFeatures]
+		if ms.sc == nil {
+			copy(dst, feats)
+			continue
+		}
+		ms.sc.normalize(dst, feats)
+	}
 
-	inTensor, err := ort.NewTensor[float32](shape, norm)
+	inTensor, err := ort.NewTensor[float32](ort.NewShape(int64(n), expectedFeatures), input)
 	if err != nil {
-		return 0, fmt.Errorf("input tensor: %w", err)
+		return nil, fmt.Errorf("input tensor: %w", err)
 	}
 	defer inTensor.Destroy()
 
-	outShape := ort.NewShape(1, 1)
-	outTensor, err := ort.NewEmptyTensor[float32](outShape)
+	outTensor, err := ort.NewEmptyTensor[float32](ort.NewShape(int64(n), 1))
 	if err != nil {
-		return 0, fmt.Errorf("output tensor: %w", err)
+		return nil, fmt.Errorf("output tensor: %w", err)
 	}
 	defer outTensor.Destroy()
 
@@ -171,14 +251,17 @@ func (ms *modelServer) predict(features []float32) (float32, error) {
 		[]ort.ArbitraryTensor{inTensor},
 		[]ort.ArbitraryTensor{outTensor},
 	); err != nil {
-		return 0, fmt.Errorf("inference: %w", err)
+		return nil, fmt.Errorf("inference: %w", err)
 	}
 
 	data := outTensor.GetData()
-	if len(data) == 0 {
-		return 0, errors.New("empty inference output")
+	if len(data) < n {
+		return nil, errors.New("short inference output")
 	}
-	return data[0], nil
+	// Copy out so the result never aliases tensor memory after Destroy.
+	scores := make([]float32, n)
+	copy(scores, data)
+	return scores, nil
 }
 
 // ─── HTTP handlers ────────────────────────────────────────────────────────────
@@ -254,9 +337,9 @@ func buildHandlers(ms *modelServer) *mux.Router {
 			return
 		}
 
-		scores := make([]float32, len(req.Servers))
+		rows := make([][]float32, len(req.Servers))
 		for i, srv := range req.Servers {
-			feats := []float32{
+			rows[i] = []float32{
 				srv.CPUUsage,
 				srv.MemoryUsage,
 				float32(srv.ActiveConns),
@@ -264,13 +347,12 @@ func buildHandlers(ms *modelServer) *mux.Router {
 				srv.ResponseP95,
 				float32(srv.Capacity),
 			}
-			score, err := ms.predict(feats)
-			if err != nil {
-				log.Printf("prediction error for server %d: %v", srv.ServerID, err)
-				http.Error(w, "prediction failed", http.StatusInternalServerError)
-				return
-			}
-			scores[i] = score
+		}
+		scores, err := ms.predict(rows)
+		if err != nil {
+			log.Printf("prediction error for %d servers: %v", len(rows), err)
+			http.Error(w, "prediction failed", http.StatusInternalServerError)
+			return
 		}
 
 		w.Header().Set("Content-Type", "application/json")
@@ -0,0 +1,89 @@
+// File: ml/model-server/main_test.go
+package main
+
+import (
+	"os"
+	"path/filepath"
+	"testing"
+)
+
+func writeScaler(t *testing.T, body string) string {
+	t.Helper()
+	path := filepath.Join(t.TempDir(), "scaler.json")
+	if err := os.WriteFile(path, []byte(body), 0o600); err != nil {
+		t.Fatalf("write scaler: %v", err)
+	}
+	return path
+}
+
+const validScaler = `{"mean":[1,2,3,4,5,6],"scale":[1,1,1,1,1,2]}`
+
+func TestLoadScaler_MissingFileIsNil(t *testing.T) {
+	sc, err := loadScaler(filepath.Join(t.TempDir(), "scaler.json"))
+	if err != nil {
+		t.Fatalf("loadScaler() error: %v", err)
+	}
+	if sc != nil {
+		t.Errorf("loadScaler() = %+v, want nil", sc)
+	}
+}
+
+func TestLoadScaler_Valid(t *testing.T) {
+	sc, err := loadScaler(writeScaler(t, validScaler))
+	if err != nil {
+		t.Fatalf("loadScaler() error: %v", err)
+	}
+	dst := make([]float32, expectedFeatures)
+	sc.normalize(dst, []float32{1, 2, 3, 4, 5, 8})
+	for i, want := range []float32{0, 0, 0, 0, 0, 1} {
+		if dst[i] != want {
+			t.Errorf("normalize()[%d] = %v, want %v", i, dst[i], want)
+		}
+	}
+}
+
+func TestLoadScaler_Invalid(t *testing.T) {
+	cases := map[string]string{
+		"short mean":  `{"mean":[1,2,3],"scale":[1,1,1,1,1,1]}`,
+		"short scale": `{"mean":[1,2,3,4,5,6],"scale":[1]}`,
+		"bad json":    `{"mean":`,
+	}
+	for name, body := range cases {
+		t.Run(name, func(t *testing.T) {
+			if _, err := loadScaler(writeScaler(t, body)); err == nil {
+				t.Error("expected error, got nil")
+			}
+		})
+	}
+}
+
+func TestResolveScaler_InGraphIgnoresScaler(t *testing.T) {
+	sc, err := resolveScaler(true, writeScaler(t, validScaler))
+	if err != nil {
+		t.Fatalf("resolveScaler() error: %v", err)
+	}
+	if sc != nil {
+		t.Errorf("resolveScaler() = %+v, want nil for an in_graph model", sc)
+	}
+}
+
+func TestResolveScaler_InGraphWithoutScaler(t *testing.T) {
+	sc, err := resolveScaler(true, filepath.Join(t.TempDir(), "scaler.json"))
+	if err != nil || sc != nil {
+		t.Errorf("resolveScaler() = (%+v, %v), want (nil, nil)", sc, err)
+	}
+}
+
+func TestResolveScaler_UnmarkedModelNeedsScaler(t *testing.T) {
+	if _, err := resolveScaler(false, filepath.Join(t.TempDir(), "scaler.json")); err == nil {
+		t.Error("expected error for an unmarked model without scaler.json, got nil")
+	}
+
+	sc, err := resolveScaler(false, writeScaler(t, validScaler))
+	if err != nil {
+		t.Fatalf("resolveScaler() error: %v", err)
+	}
+	if sc == nil {
+		t.Error("resolveScaler() = nil, want the loaded scaler")
+	}
+}
@@ -24,7 +24,7 @@ echo "==> [2/4] Validating feature alignment..."
 pytest ml/training/tests/test_feature_alignment.py -v
 
 echo "==> [3/4] Verifying model files exist..."
-for f in ml/models/load_balancer.onnx ml/models/scaler.json ml/models/inference_features.json; do
+for f in ml/models/load_balancer.onnx ml/models/inference_features.json; do
   [[ -f "$f" ]] || { echo "ERROR: $f missing after training"; exit 1; }
 done
 
@@ -0,0 +1,152 @@
+"""
+Checks the COPY CSV decoder and the training-extract cache without a database.
+"""
+
+import io
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pytest
+
+import train_model
+from train_model import (
+    _EXTRACT_SCHEMA,
+    CACHE_TTL_SECONDS,
+    _decode_copy_csv,
+    fetch_training_data,
+)
+
+# As written by Postgres: t/f booleans, empty unquoted fields for NULL, and
+# timestamptz in ISO DateStyle with short (+00) and long (+05:30) offsets.
+_COPY_CSV = b"""\
+server_id,response_time,status,created_at,cpu_usage,memory_usage,request_count,capacity,weight
+1,120,t,2024-05-01 12:00:00.123456+00,41.5,60.25,7,10,1
+2,950,f,2024-05-01 17:30:01+05:30,,55,,20,2
+"""
+
+
+def test_decode_copy_csv_types_and_values():
+    table = _decode_copy_csv(io.BytesIO(_COPY_CSV))
+    assert table.schema == _EXTRACT_SCHEMA
+
+    rows = table.to_pylist()
+    assert [r["status"] for r in rows] == [True, False]
+    assert rows[1]["cpu_usage"] is None
+    assert rows[1]["request_count"] is None
+    assert rows[0]["created_at"] == datetime(
+        2024, 5, 1, 12, 0, 0, 123456, tzinfo=timezone.utc
+    )
+    # 17:30:01+05:30 normalises to 12:00:01 UTC.
+    assert rows[1]["created_at"] == datetime(2024, 5, 1, 12, 0, 1, tzinfo=timezone.utc)
+
+
+def test_decode_copy_csv_empty_keeps_schema():
+    header = _COPY_CSV.splitlines()[0] + b"\n"
+    table = _decode_copy_csv(io.BytesIO(header))
+    assert table.num_rows == 0
+    assert table.schema == _EXTRACT_SCHEMA
+
+
+def _rows(n: int = 2) -> pa.Table:
+    # A fresh table per call: fetch_training_data converts with self_destruct=True.
+    return pa.table({"server_id": pa.array(range(n), pa.int32()), "status": [True] * n})
+
+
+@pytest.fixture
+def fake_db(tmp_path, monkeypatch):
+    """Point the cache at tmp_path and replace _fetch_arrow; returns the query log."""
+    for key, value in {
+        "DB_HOST": "db.example",
+        "DB_PORT": "5432",
+        "DB_NAME": "neura",
+        "DB_USER": "u",
+        "DB_PASSWORD": "p",
+    }.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(train_model, "CACHE_DIR", tmp_path)
+
+    calls = []
+
+    def install(n_rows: int) -> list:
+        def _fetch(query: str) -> pa.Table:
+            calls.append(query)
+            return _rows(n_rows)
+
+        monkeypatch.setattr(train_model, "_fetch_arrow", _fetch)
+        return calls
+
+    return install
+
+
+def test_cache_hit_skips_database(fake_db, tmp_path):
+    calls = fake_db(2)
+    first = fetch_training_data()
+    second = fetch_training_data()
+
+    assert len(calls) == 1
+    assert second.equals(first)
+    files = sorted(p.name for p in tmp_path.iterdir())
+    # Written via a temp file and renamed; nothing partial is left behind.
+    assert len(files) == 1
+    assert re.fullmatch(
+        r"train_db\.example_5432_neura_7d_[0-9a-f]{12}\.arrow", files[0]
+    )
+
+
+def test_cache_expires_after_ttl(fake_db, tmp_path):
+    calls = fake_db(2)
+    fetch_training_data()
+    (cache_file,) = tmp_path.iterdir()
+    stale = time.time() - CACHE_TTL_SECONDS - 1
+    os.utime(cache_file, (stale, stale))
+
+    fetch_training_data()
+    assert len(calls) == 2
+    assert cache_file.stat().st_mtime > stale
+
+
+def test_use_cache_false_neither_reads_nor_writes(fake_db, tmp_path):
+    calls = fake_db(2)
+    fetch_training_data()
+    fetch_training_data(use_cache=False)
+    assert len(calls) == 2
+
+    for f in tmp_path.iterdir():
+        f.unlink()
+    fetch_training_data(use_cache=False)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_empty_extract_is_not_cached(fake_db, tmp_path):
+    calls = fake_db(0)
+    assert fetch_training_data().empty
+    assert list(tmp_path.iterdir()) == []
+
+    fake_db(2)
+    assert len(fetch_training_data()) == 2
+    assert len(calls) == 2
+
+
+def test_cache_is_keyed_by_database(fake_db, monkeypatch):
+    calls = fake_db(2)
+    fetch_training_data()
+    monkeypatch.setenv("DB_NAME", "other")
+    fetch_training_data()
+    assert len(calls) == 2
+
+
+def test_cache_is_keyed_by_query_and_schema(fake_db, monkeypatch):
+    calls = fake_db(2)
+    fetch_training_data()
+    monkeypatch.setattr(train_model, "_EXTRACT_SQL", train_model._EXTRACT_SQL + " ")
+    fetch_training_data()
+    monkeypatch.setattr(
+        train_model,
+        "_EXTRACT_SCHEMA",
+        _EXTRACT_SCHEMA.remove(_EXTRACT_SCHEMA.get_field_index("weight")),
+    )
+    fetch_training_data()
+    assert len(calls) == 3
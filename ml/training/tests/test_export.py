@@ -0,0 +1,133 @@
+"""
+Checks that the exported ONNX graph normalises raw features the same way
+the training StandardScaler does, that the served model (fp32 or int8) scores
+each row independently of the batch, and that int8 quantization keeps scores close.
+"""
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+import pytest
+import torch
+from sklearn.preprocessing import StandardScaler
+
+import train_model
+from train_model import (
+    FEATURES,
+    NORMALIZATION_IN_GRAPH,
+    NORMALIZATION_KEY,
+    ScaledServerScorer,
+    ServerScorer,
+    export_onnx,
+    publish_model,
+    quantize_onnx,
+)
+
+
+def _fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(50.0, 20.0, size=(64, len(FEATURES))).astype(np.float32)
+    scaler = StandardScaler().fit(X)
+    scorer = ServerScorer(len(FEATURES)).eval()
+    return X, scaler, scorer
+
+
+def test_scaled_scorer_matches_scaler_transform():
+    X, scaler, scorer = _fitted()
+    fused = ScaledServerScorer(scorer, scaler.mean_, scaler.scale_).eval()
+    with torch.no_grad():
+        got = fused(torch.from_numpy(X)).numpy()
+        expected = scorer(torch.from_numpy(scaler.transform(X)).float()).numpy()
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_onnx_export_takes_raw_features(tmp_path):
+    X, scaler, scorer = _fitted()
+    path = tmp_path / "model.onnx"
+    export_onnx(
+        ScaledServerScorer(scorer, scaler.mean_, scaler.scale_), len(FEATURES), path
+    )
+
+    sess = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+    (got,) = sess.run(["predicted_score"], {"features": X})
+    with torch.no_grad():
+        expected = scorer(torch.from_numpy(scaler.transform(X)).float()).numpy()
+    np.testing.assert_allclose(got, expected, rtol=1e-4, atol=1e-4)
+
+
+def _props(path):
+    return {p.key: p.value for p in onnx.load(str(path)).metadata_props}
+
+
+def test_fused_export_is_marked_in_graph(tmp_path):
+    X, scaler, scorer = _fitted()
+    fused_path = tmp_path / "fused.onnx"
+    plain_path = tmp_path / "plain.onnx"
+    export_onnx(
+        ScaledServerScorer(scorer, scaler.mean_, scaler.scale_),
+        len(FEATURES),
+        fused_path,
+    )
+    export_onnx(scorer, len(FEATURES), plain_path)
+
+    assert _props(fused_path)[NORMALIZATION_KEY] == NORMALIZATION_IN_GRAPH
+    assert NORMALIZATION_KEY not in _props(plain_path)
+
+
+def test_quantized_model_tracks_fp32(tmp_path):
+    X, scaler, scorer = _fitted()
+    fp32_path = tmp_path / "model.fp32.onnx"
+    int8_path = tmp_path / "model.onnx"
+    export_onnx(
+        ScaledServerScorer(scorer, scaler.mean_, scaler.scale_),
+        len(FEATURES),
+        fp32_path,
+    )
+    quantize_onnx(fp32_path, int8_path, X)
+
+    assert int8_path.stat().st_size < fp32_path.stat().st_size
+    assert _props(int8_path)[NORMALIZATION_KEY] == NORMALIZATION_IN_GRAPH
+    (fp32,) = ort.InferenceSession(str(fp32_path)).run(None, {"features": X})
+    (int8,) = ort.InferenceSession(str(int8_path)).run(None, {"features": X})
+    np.testing.assert_allclose(int8, fp32, atol=0.05 * np.abs(fp32).max())
+
+
+def test_failed_quantization_serves_fp32(tmp_path, monkeypatch):
+    X, scaler, scorer = _fitted()
+    fp32_path = tmp_path / "model.fp32.onnx"
+    served_path = tmp_path / "model.onnx"
+    export_onnx(
+        ScaledServerScorer(scorer, scaler.mean_, scaler.scale_),
+        len(FEATURES),
+        fp32_path,
+    )
+
+    def broken(src, dst, calibration):
+        raise RuntimeError("quantizer unavailable")
+
+    monkeypatch.setattr(train_model, "quantize_onnx", broken)
+    publish_model(fp32_path, served_path, calibration=X)
+
+    assert served_path.read_bytes() == fp32_path.read_bytes()
+
+
+@pytest.mark.parametrize("quantize", [False, True], ids=["fp32", "int8"])
+def test_served_model_scores_rows_independently(tmp_path, quantize):
+    # /predict scores every server in one batch; a server's score must not
+    # depend on which other servers are in the request.
+    X, scaler, scorer = _fitted()
+    fp32_path = tmp_path / "model.fp32.onnx"
+    served_path = tmp_path / "model.onnx"
+    export_onnx(
+        ScaledServerScorer(scorer, scaler.mean_, scaler.scale_),
+        len(FEATURES),
+        fp32_path,
+    )
+    publish_model(fp32_path, served_path, calibration=X if quantize else None)
+
+    assert (served_path.read_bytes() == fp32_path.read_bytes()) is not quantize
+    sess = ort.InferenceSession(str(served_path))
+    outlier = np.full((1, len(FEATURES)), 1e4, dtype=np.float32)
+    (batched,) = sess.run(None, {"features": np.vstack([X, outlier])})
+    per_row = np.vstack([sess.run(None, {"features": row[None]})[0] for row in X])
+    np.testing.assert_allclose(batched[: len(X)], per_row, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,187 @@
+"""
+Checks the feature, target and metric helpers used by train_model.py.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_model
+from train_model import (
+    FEATURES,
+    _error_stats,
+    _grouped_p95,
+    _training_arrays,
+    calculate_target,
+    create_features,
+)
+
+
+def _sample_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "server_id": [2, 1, 2, 1, 1],
+            "response_time": [100, 40, 300, 60, 80],
+            "status": [True, True, False, False, True],
+            "cpu_usage": [50.0, 10.0, 70.0, 20.0, np.nan],
+            "memory_usage": [30.0, 40.0, 50.0, 60.0, 70.0],
+            "request_count": [1, 2, 3, 4, 5],
+            "capacity": [10, 20, 10, 20, 20],
+        }
+    )
+
+
+def test_create_features_shape():
+    feats = create_features(_sample_frame())
+    assert list(feats.columns) == ["server_id"] + FEATURES
+    assert feats["server_id"].tolist() == [1, 2]
+
+
+def test_create_features_error_rate():
+    feats = create_features(_sample_frame()).set_index("server_id")
+    assert feats.loc[1, "error_rate"] == 1 / 11
+    assert feats.loc[2, "error_rate"] == 1 / 4
+
+
+def test_calculate_target_is_per_server_mean():
+    target = calculate_target(_sample_frame())
+    assert target.index.tolist() == [1, 2]
+    # Rows with no matching metric sample (NaN cpu_usage) are skipped.
+    np.testing.assert_allclose(target.to_numpy(), [38.05, 152.05])
+
+
+def test_server_without_metrics_is_dropped_from_training_set():
+    df = pd.concat(
+        [
+            _sample_frame(),
+            pd.DataFrame(
+                {
+                    "server_id": [0, 0],
+                    "response_time": [10, 20],
+                    "status": [True, True],
+                    "cpu_usage": [np.nan, np.nan],
+                    "memory_usage": [np.nan, np.nan],
+                    "request_count": [np.nan, np.nan],
+                    "capacity": [5, 5],
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    feats = create_features(df)
+    target = calculate_target(df)
+    assert 0 in feats["server_id"].tolist()
+    assert target.index.tolist() == [1, 2]
+
+    # Reverse the feature rows: X and y must still pair up by server_id.
+    X, y = _training_arrays(feats.iloc[::-1], target)
+    assert not np.isnan(y).any()
+    np.testing.assert_allclose(y, [38.05, 152.05], rtol=1e-6)
+    expected = feats.set_index("server_id").loc[[1, 2], FEATURES].to_numpy(np.float32)
+    np.testing.assert_array_equal(X, expected)
+
+
+def test_grouped_p95_matches_numpy_percentile():
+    rng = np.random.default_rng(0)
+    values = rng.exponential(100.0, size=1000)
+    codes = rng.integers(0, 7, size=1000)
+    got = _grouped_p95(values, codes, 7)
+    expected = [np.percentile(values[codes == g], 95) for g in range(7)]
+    np.testing.assert_array_equal(got, expected)
+
+
+def test_grouped_p95_ties_and_empty_groups():
+    # Interleaved codes with heavy ties; group 1 has no rows.
+    rng = np.random.default_rng(4)
+    codes = rng.choice([0, 2, 3], size=400)
+    values = rng.integers(0, 5, size=400).astype(np.float64)
+    got = _grouped_p95(values, codes, 4)
+    assert np.isnan(got[1])
+    expected = [np.percentile(values[codes == g], 95) for g in (0, 2, 3)]
+    np.testing.assert_array_equal(got[[0, 2, 3]], expected)
+
+
+def test_grouped_p95_single_row_group():
+    got = _grouped_p95(np.array([5.0, 1.0, 3.0]), np.array([0, 1, 1]), 2)
+    np.testing.assert_allclose(got, [5.0, np.percentile([1.0, 3.0], 95)])
+
+
+def test_duckdb_and_pandas_aggregation_agree(monkeypatch):
+    pytest.importorskip("duckdb")
+    rng = np.random.default_rng(1)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "server_id": rng.integers(1, 6, size=n),
+            "response_time": rng.integers(5, 500, size=n),
+            "status": rng.random(n) > 0.1,
+            "cpu_usage": np.where(rng.random(n) > 0.05, rng.random(n) * 100, np.nan),
+            "memory_usage": rng.random(n) * 100,
+            "request_count": rng.integers(0, 20, size=n),
+            "capacity": 10,
+        }
+    )
+    fast = create_features(df)
+    monkeypatch.setattr(train_model, "duckdb", None)
+    slow = create_features(df)
+    pd.testing.assert_frame_equal(fast, slow, check_dtype=False)
+
+
+def test_error_stats_match_numpy():
+    rng = np.random.default_rng(2)
+    y_true = rng.random(257).astype(np.float32) * 100
+    y_pred = y_true + rng.normal(0, 5, size=257).astype(np.float32)
+    err = np.abs(y_pred.astype(np.float64) - y_true)
+    mae, rmse, max_err = _error_stats(y_true, y_pred)
+    np.testing.assert_allclose(
+        [mae, rmse, max_err], [err.mean(), np.sqrt((err**2).mean()), err.max()]
+    )
+
+
+def test_grouped_p95_small_groups_interpolate():
+    # Group g has g + 1 rows, covering both exact-rank and interpolated cases.
+    values = np.concatenate(
+        [np.arange(g + 1, dtype=np.float64)[::-1] for g in range(25)]
+    )
+    codes = np.concatenate([np.full(g + 1, g) for g in range(25)])
+    got = _grouped_p95(values, codes, 25)
+    expected = [np.percentile(np.arange(g + 1), 95) for g in range(25)]
+    np.testing.assert_array_equal(got, expected)
+
+
+def test_error_stats_rejects_nan():
+    y_true = np.array([1.0, 2.0, np.nan, 4.0], dtype=np.float32)
+    y_pred = np.array([1.5, 2.0, 3.0, 4.0], dtype=np.float32)
+    with pytest.raises(ValueError, match="NaN"):
+        _error_stats(y_true, y_pred)
+    with pytest.raises(ValueError, match="NaN"):
+        _error_stats(y_pred, y_true)
+
+
+def test_grouped_p95_faster_than_groupby_percentile():
+    # The pandas path replaced groupby().agg(lambda x: np.percentile(x, 95));
+    # it must stay faster than that on a production-sized extract.
+    rng = np.random.default_rng(3)
+    n = 1_000_000
+    codes = rng.integers(0, 10, size=n)
+    values = rng.exponential(100.0, size=n)
+    frame = pd.DataFrame({"server_id": codes, "response_time": values})
+    _grouped_p95(values[:10], codes[:10], 10)  # compile outside the timing
+
+    def best(fn):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    kernel = best(lambda: _grouped_p95(values, codes, 10))
+    baseline = best(
+        lambda: frame.groupby("server_id")["response_time"].agg(
+            lambda x: np.percentile(x, 95)
+        )
+    )
+    assert kernel < baseline
@@ -4,8 +4,8 @@ NeuraBalancer ML model training pipeline.
 
 Fetches historical server metrics from TimescaleDB, engineers features,
 trains a feed-forward regression network, and exports:
-  - ml/models/load_balancer.onnx   (inference model)
-  - ml/models/scaler.json          (StandardScaler parameters)
+  - ml/models/load_balancer.onnx   (inference model, StandardScaler folded in)
+  - ml/models/load_balancer.fp32.onnx  (same model, never quantized)
   - ml/models/inference_features.json  (feature names for alignment validation)
 
 Usage:
@@ -13,27 +13,64 @@ Usage:
 
 Environment variables (loaded from .env):
     DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+    TRAIN_TORCH_COMPILE  optional; "1" runs training through torch.compile
+    TRAIN_QUANTIZE_INT8  optional; "1" serves an int8 statically quantized model
+
+Training rows are streamed from Postgres as Arrow columns. When the optional
+`adbc-driver-postgresql` package is installed it is used directly; otherwise
+the query is wrapped in `COPY ... TO STDOUT` and parsed with pyarrow's CSV reader.
+Per-server aggregation runs in pandas + numba by default; when the optional
+`duckdb` package is installed it runs as a single DuckDB GROUP BY instead.
 """
 
 from __future__ import annotations
 
+import hashlib
+import inspect
+import io
 import json
 import logging
 import os
+import re
+import shutil
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote
 
 import numpy as np
+import onnx
 import pandas as pd
 import psycopg2
+import psycopg2.pool
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from dotenv import load_dotenv
-from sklearn.metrics import mean_absolute_error
+from numba import njit
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantType,
+    quantize_static,
+)
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+try:
+    import adbc_driver_postgresql.dbapi as adbc_pg
+except ImportError:  # optional — falls back to psycopg2 COPY
+    adbc_pg = None
+
+try:
+    import duckdb
+except ImportError:  # optional — falls back to pandas groupby
+    duckdb = None
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -50,13 +87,73 @@ FEATURES: list[str] = [
     "response_p95",
     "capacity",
 ]
-OUTPUT_DIR = Path("ml/models")
+# ONNX metadata_props entry marking a graph that standardises its own inputs.
+# Keep in sync with ml/model-server/main.go normalizationKey/inGraph.
+NORMALIZATION_KEY = "normalization"
+NORMALIZATION_IN_GRAPH = "in_graph"
+# Both anchored to the repo's ml/ directory: the documented entrypoints run
+# this script from ml/training, the model server reads ./ml/models, and the
+# cache holds raw production request rows.
+OUTPUT_DIR = Path(__file__).resolve().parents[1] / "models"
+CACHE_DIR = Path(__file__).resolve().parents[1] / "cache"
+CACHE_TTL_SECONDS = 3600
+
+# Column types of the training extract, matching what the ADBC driver yields
+# for the Postgres schema. Declared up front so the CSV reader never infers
+# types or re-parses timestamps, and an empty extract still has real dtypes.
+_EXTRACT_SCHEMA = pa.schema(
+    [
+        ("server_id", pa.int32()),
+        ("response_time", pa.int64()),
+        ("status", pa.bool_()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("cpu_usage", pa.float64()),
+        ("memory_usage", pa.float64()),
+        ("request_count", pa.int32()),
+        ("capacity", pa.int32()),
+        ("weight", pa.int32()),
+    ]
+)
+
+# Training extract; %d is the lookback window in days.
+_EXTRACT_SQL = """
+    WITH base AS (
+        SELECT
+            r.server_id,
+            r.response_time_ms  AS response_time,
+            r.status,
+            r.created_at,
+            m.cpu_usage,
+            m.memory_usage,
+            m.request_count,
+            s.capacity,
+            s.weight
+        FROM requests r
+        JOIN servers s ON r.server_id = s.id
+        LEFT JOIN LATERAL (
+            SELECT cpu_usage, memory_usage, request_count
+            FROM metrics m
+            WHERE m.server_id = r.server_id
+              AND m.created_at BETWEEN r.created_at - INTERVAL '2 minutes'
+                                    AND r.created_at
+            ORDER BY m.created_at DESC
+            LIMIT 1
+        ) m ON TRUE
+        WHERE r.created_at >= NOW() - INTERVAL '%d days'
+    )
+    SELECT * FROM base
+"""
+
+# Shared across fetch_training_data calls so repeated extracts in one process
+# (e.g. hyper-parameter sweeps) skip the TCP/auth handshake.
+_DB_POOL: psycopg2.pool.ThreadedConnectionPool | None = None
+_ADBC_CONN = None  # adbc_pg connection; not thread-safe, used by the main thread only
 
 
 # ─── Data loading ──────────────────────────────────────────────────────────────
 
 
-def _get_db_conn() -> psycopg2.extensions.connection:
+def _db_params() -> dict:
     load_dotenv()
     required = ["DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASSWORD"]
     missing = [k for k in required if not os.getenv(k)]
@@ -64,74 +161,205 @@ def _get_db_conn() -> psycopg2.extensions.connection:
         log.error("Missing environment variables: %s", missing)
         sys.exit(1)
 
-    return psycopg2.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        dbname=os.environ["DB_NAME"],
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        connect_timeout=10,
+    return {
+        "host": os.environ["DB_HOST"],
+        "port": int(os.environ["DB_PORT"]),
+        "dbname": os.environ["DB_NAME"],
+        "user": os.environ["DB_USER"],
+        "password": os.environ["DB_PASSWORD"],
+    }
+
+
+@contextmanager
+def _db_conn() -> Iterator[psycopg2.extensions.connection]:
+    global _DB_POOL
+    if _DB_POOL is None:
+        _DB_POOL = psycopg2.pool.ThreadedConnectionPool(
+            1, 4, **_db_params(), connect_timeout=10
+        )
+    conn = _DB_POOL.getconn()
+    try:
+        yield conn
+    finally:
+        # putconn rolls back the implicit transaction opened by COPY.
+        _DB_POOL.putconn(conn)
+
+
+def _adbc_conn():
+    global _ADBC_CONN
+    if _ADBC_CONN is None:
+        _ADBC_CONN = adbc_pg.connect(_db_uri())
+    return _ADBC_CONN
+
+
+def _close_db_connections() -> None:
+    global _DB_POOL, _ADBC_CONN
+    if _DB_POOL is not None:
+        _DB_POOL.closeall()
+        _DB_POOL = None
+    if _ADBC_CONN is not None:
+        _ADBC_CONN.close()
+        _ADBC_CONN = None
+
+
+def _db_uri() -> str:
+    p = _db_params()
+    return (
+        f"postgresql://{quote(p['user'], safe='')}:{quote(p['password'], safe='')}"
+        f"@{p['host']}:{p['port']}/{quote(p['dbname'], safe='')}?connect_timeout=10"
     )
 
 
-def fetch_training_data(lookback_days: int = 7) -> pd.DataFrame:
-    """Fetch joined request + metric rows from the last `lookback_days` days."""
-    query = """
-        WITH base AS (
-            SELECT
-                r.server_id,
-                r.response_time_ms  AS response_time,
-                r.status,
-                r.created_at,
-                m.cpu_usage,
-                m.memory_usage,
-                m.request_count,
-                s.capacity,
-                s.weight
-            FROM requests r
-            JOIN servers s ON r.server_id = s.id
-            LEFT JOIN LATERAL (
-                SELECT cpu_usage, memory_usage, request_count
-                FROM metrics m
-                WHERE m.server_id = r.server_id
-                  AND m.created_at BETWEEN r.created_at - INTERVAL '2 minutes'
-                                        AND r.created_at
-                ORDER BY m.created_at DESC
-                LIMIT 1
-            ) m ON TRUE
-            WHERE r.created_at >= NOW() - INTERVAL %(lookback)s
-        )
-        SELECT * FROM base
+def _fetch_arrow(query: str) -> pa.Table:
+    """Run `query` and return the result as an Arrow table without per-row Python objects."""
+    if adbc_pg is not None:
+        conn = _adbc_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                return cur.fetch_arrow_table()
+        finally:
+            # End the read transaction so the cached connection holds no snapshot.
+            conn.rollback()
+
+    buf = io.BytesIO()
+    with _db_conn() as conn, conn.cursor() as cur:
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", buf)
+    buf.seek(0)
+    return _decode_copy_csv(buf)
+
+
+def _decode_copy_csv(buf: io.BytesIO) -> pa.Table:
+    """Parse the output of `COPY ... TO STDOUT WITH (FORMAT csv, HEADER true)`."""
+    # Postgres writes booleans as t/f and NULL as an empty unquoted field.
+    opts = pa_csv.ConvertOptions(
+        column_types=_EXTRACT_SCHEMA, true_values=["t"], false_values=["f"]
+    )
+    return pa_csv.read_csv(buf, convert_options=opts)
+
+
+def fetch_training_data(lookback_days: int = 7, use_cache: bool = True) -> pd.DataFrame:
     """
-    conn = _get_db_conn()
-    try:
-        df = pd.read_sql(query, conn, params={"lookback": f"{lookback_days} days"})
-        log.info("Fetched %d rows from database", len(df))
-        return df
-    finally:
-        conn.close()
+    Fetch joined request + metric rows from the last `lookback_days` days.
+
+    Non-empty extracts are cached per database and query as uncompressed Arrow IPC files
+    under CACHE_DIR and memory-mapped on re-runs younger than CACHE_TTL_SECONDS,
+    so repeated training runs do not re-pull the same rows from Postgres.
+    """
+    p = _db_params()
+    # COPY cannot take bind parameters, so the interval is inlined as an integer.
+    query = _EXTRACT_SQL % int(lookback_days)
+    # Keyed by database identity so pointing DB_* elsewhere never reuses rows,
+    # and by query + schema so a changed extract never reads an old file.
+    db_key = re.sub(r"[^A-Za-z0-9.-]+", "_", f"{p['host']}_{p['port']}_{p['dbname']}")
+    shape_key = hashlib.sha256(f"{query}\n{_EXTRACT_SCHEMA}".encode()).hexdigest()[:12]
+    cache_path = CACHE_DIR / f"train_{db_key}_{int(lookback_days)}d_{shape_key}.arrow"
+    if use_cache and cache_path.exists():
+        age = time.time() - cache_path.stat().st_mtime
+        if age < CACHE_TTL_SECONDS:
+            table = feather.read_table(cache_path, memory_map=True)
+            log.info("Loaded %d rows from cache %s", table.num_rows, cache_path)
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    table = _fetch_arrow(query)
+    log.info("Fetched %d rows from database", table.num_rows)
+
+    # An empty extract is not cached, so the next run re-queries once data arrives.
+    if use_cache and table.num_rows > 0:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
 
 
 # ─── Feature engineering ──────────────────────────────────────────────────────
 
 
-def create_features(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        log.warning("No data — returning empty feature frame")
-        return pd.DataFrame(columns=["server_id"] + FEATURES)
+@njit(cache=True)
+def _grouped_p95(values: np.ndarray, codes: np.ndarray, ngroups: int) -> np.ndarray:
+    """
+    95th percentile of `values` per group code, matching np.percentile's
+    linear interpolation. Codes are dense 0..ngroups-1, so rows are bucketed
+    by group with one counting-sort scatter, then each block gets a single
+    O(n) partition at the lower bracketing rank.
+    """
+    counts = np.bincount(codes, minlength=ngroups)
+    starts = np.zeros(ngroups + 1, dtype=np.int64)
+    starts[1:] = np.cumsum(counts)
+
+    buf = np.empty(values.shape[0], dtype=np.float64)
+    nxt = starts[:-1].copy()
+    for i in range(values.shape[0]):
+        g = codes[i]
+        buf[nxt[g]] = values[i]
+        nxt[g] += 1
+
+    out = np.empty(ngroups, dtype=np.float64)
+    for g in range(ngroups):
+        n = counts[g]
+        if n == 0:
+            out[g] = np.nan
+            continue
+        block = buf[starts[g] : starts[g + 1]]
+        pos = 0.95 * (n - 1)
+        lo = int(pos)
+        part = np.partition(block, lo)
+        value = part[lo]
+        if pos > lo:
+            # Everything right of `lo` is >= part[lo]; the next rank is its minimum.
+            value += (pos - lo) * (part[lo + 1 :].min() - value)
+        out[g] = value
+    return out
+
+
+_FEATURES_SQL = """
+    SELECT
+        server_id,
+        avg(cpu_usage)                      AS cpu_usage,
+        avg(memory_usage)                   AS memory_usage,
+        coalesce(sum(request_count), 0)     AS active_conns,
+        sum((NOT status)::INTEGER)          AS error_count,
+        quantile_cont(response_time, 0.95)  AS response_p95,
+        first(capacity)                     AS capacity
+    FROM r
+    GROUP BY server_id
+    ORDER BY server_id
+"""
 
-    df["error"] = (~df["status"]).astype(int)
-    grouped = df.groupby("server_id")
+
+def _aggregate_duckdb(df: pd.DataFrame) -> pd.DataFrame:
+    with duckdb.connect() as con:
+        con.register("r", df)
+        return con.execute(_FEATURES_SQL).df().set_index("server_id")
+
+
+def _aggregate_pandas(df: pd.DataFrame) -> pd.DataFrame:
+    grouped = df.assign(error=(~df["status"]).astype(np.int8)).groupby("server_id")
 
     agg = grouped.agg(
         cpu_usage=("cpu_usage", "mean"),
         memory_usage=("memory_usage", "mean"),
         active_conns=("request_count", "sum"),
         error_count=("error", "sum"),
-        response_p95=("response_time", lambda x: np.percentile(x, 95)),
         capacity=("capacity", "first"),
     )
 
+    codes, servers = pd.factorize(df["server_id"], sort=True)
+    p95 = _grouped_p95(
+        df["response_time"].to_numpy(dtype=np.float64), codes, len(servers)
+    )
+    agg["response_p95"] = pd.Series(p95, index=servers)
+    return agg
+
+
+def create_features(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        log.warning("No data — returning empty feature frame")
+        return pd.DataFrame(columns=["server_id"] + FEATURES)
+
+    agg = _aggregate_duckdb(df) if duckdb is not None else _aggregate_pandas(df)
+
     agg["error_rate"] = agg["error_count"] / agg["active_conns"].replace(0, 1)
     agg = agg.drop(columns=["error_count"])
     agg = agg[FEATURES].fillna(0).clip(lower=0)
@@ -146,17 +374,36 @@ def calculate_target(df: pd.DataFrame) -> pd.Series:
     if df.empty:
         return pd.Series(dtype=float)
 
-    score = (
-        df["response_time_ms"] * 0.70
-        + df["cpu_usage"] * 0.20
-        + df["error"].astype(float) * 0.10
-    )
-    return (
-        df.groupby("server_id")["response_time_ms"]
-        .transform(lambda _: score)
-        .groupby(df["server_id"])
-        .mean()
+    error = (~df["status"]).astype(np.int8)
+    score = df["response_time"] * 0.70 + df["cpu_usage"] * 0.20 + error * 0.10
+    target = score.groupby(df["server_id"]).mean()
+    # A server with no metric sample near any of its requests has no defined
+    # target; one NaN in y turns every training loss into NaN.
+    missing = target.isna()
+    if missing.any():
+        log.warning(
+            "Dropping %d server(s) with no metric samples: %s",
+            int(missing.sum()),
+            target.index[missing].tolist(),
+        )
+    return target[~missing]
+
+
+def _training_arrays(
+    feat_df: pd.DataFrame, target: pd.Series
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Join features and target on server_id (servers missing from either side
+    are dropped) and return float32 X, y ordered by server_id.
+    """
+    data = feat_df.set_index("server_id")[FEATURES].join(
+        target.rename("target"), how="inner", sort=True
     )
+    # float32 throughout: matches the model/ONNX dtype, halves memory traffic,
+    # and lets _tensor() wrap the arrays without copying.
+    X = data[FEATURES].to_numpy(dtype=np.float32)
+    y = data["target"].to_numpy(dtype=np.float32)
+    return X, y
 
 
 # ─── Model definition ──────────────────────────────────────────────────────────
@@ -183,9 +430,29 @@ class ServerScorer(nn.Module):
         return self.net(x)
 
 
+class ScaledServerScorer(nn.Module):
+    """ServerScorer with the StandardScaler folded in, so it takes raw features."""
+
+    def __init__(
+        self, scorer: ServerScorer, mean: np.ndarray, scale: np.ndarray
+    ) -> None:
+        super().__init__()
+        self.scorer = scorer
+        self.register_buffer("mean", torch.as_tensor(mean, dtype=torch.float32))
+        self.register_buffer("scale", torch.as_tensor(scale, dtype=torch.float32))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.scorer((x - self.mean) / self.scale)
+
+
 # ─── Training ─────────────────────────────────────────────────────────────────
 
 
+def _tensor(a: np.ndarray) -> torch.Tensor:
+    """Wrap a NumPy array as a float32 tensor, sharing memory when it already is one."""
+    return torch.from_numpy(np.ascontiguousarray(a)).float()
+
+
 def train(
     X_train: np.ndarray,
     y_train: np.ndarray,
@@ -194,17 +461,32 @@ def train(
     epochs: int = 150,
     batch_size: int = 64,
     lr: float = 1e-3,
+    compile_model: bool = False,
 ) -> ServerScorer:
-    model = ServerScorer(X_train.shape[1])
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    # bf16 autocast only pays off on CUDA with native bf16 (compute capability
+    # 8.0+); elsewhere training stays in fp32. bf16 keeps the fp32 exponent
+    # range, so no GradScaler is needed.
+    use_amp = device.type == "cuda" and torch.cuda.is_bf16_supported()
+
+    model = ServerScorer(X_train.shape[1]).to(device)
+    # The compiled wrapper shares parameters with `model`; only the forward
+    # calls go through it, so state_dict() and export keep using `model`.
+    forward = torch.compile(model) if compile_model else model
     criterion = nn.MSELoss()
     optimizer = optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-2)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, patience=10, factor=0.5)
 
-    dataset = torch.utils.data.TensorDataset(
-        torch.FloatTensor(X_train),
-        torch.FloatTensor(y_train),
+    dataset = torch.utils.data.TensorDataset(_tensor(X_train), _tensor(y_train))
+    loader = torch.utils.data.DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=True,
+        pin_memory=device.type == "cuda",
     )
-    loader = torch.utils.data.DataLoader(dataset, batch_size=batch_size, shuffle=True)
+    # The validation set is static — materialise it on the device once.
+    X_val_t = _tensor(X_val).to(device)
+    y_val_t = _tensor(y_val).unsqueeze(1).to(device)
 
     best_val_loss = float("inf")
     best_state: dict = {}
@@ -214,16 +496,19 @@ def train(
     for epoch in range(1, epochs + 1):
         model.train()
         for xb, yb in loader:
+            xb = xb.to(device, non_blocking=True)
+            yb = yb.to(device, non_blocking=True)
             optimizer.zero_grad()
-            loss = criterion(model(xb), yb.unsqueeze(1))
+            with torch.autocast(device.type, dtype=torch.bfloat16, enabled=use_amp):
+                loss = criterion(forward(xb), yb.unsqueeze(1))
             loss.backward()
             nn.utils.clip_grad_norm_(model.parameters(), 1.0)
             optimizer.step()
 
         model.eval()
-        with torch.no_grad():
-            val_pred = model(torch.FloatTensor(X_val))
-            val_loss = criterion(val_pred, torch.FloatTensor(y_val).unsqueeze(1)).item()
+        # fp32 so early stopping and checkpoint selection compare exact losses.
+        with torch.inference_mode():
+            val_loss = criterion(forward(X_val_t), y_val_t).item()
 
         scheduler.step(val_loss)
 
@@ -249,19 +534,39 @@ def train(
 
     model.load_state_dict(best_state)
     log.info("Training complete — best val_loss=%.4f", best_val_loss)
-    return model
+    # Evaluation and ONNX export run on CPU in fp32.
+    return model.cpu()
+
+
+def _error_stats(y_true: np.ndarray, y_pred: np.ndarray) -> tuple[float, float, float]:
+    """MAE, RMSE and max absolute error of the test-split predictions."""
+    err = np.abs(y_pred.astype(np.float64) - y_true)
+    nan_count = int(np.isnan(err).sum())
+    if nan_count:
+        # Same contract as sklearn's metrics: NaN inputs are an error, not a
+        # silently skewed score.
+        raise ValueError(f"{nan_count} NaN value(s) in targets or predictions")
+    return float(err.mean()), float(np.sqrt((err**2).mean())), float(err.max())
 
 
 # ─── Export ───────────────────────────────────────────────────────────────────
 
 
-def export_onnx(model: ServerScorer, input_size: int, path: Path) -> None:
+_HAS_DYNAMO_EXPORT = "dynamo" in inspect.signature(torch.onnx.export).parameters
+
+
+def export_onnx(model: nn.Module, input_size: int, path: Path) -> None:
     """
     Export to ONNX with input_names=['features'], output_names=['predicted_score'].
     These names MUST match MODEL_INPUT_NAME / MODEL_OUTPUT_NAME in the model server config.
+    Pass a ScaledServerScorer so the graph normalises raw features itself.
     """
     dummy = torch.randn(1, input_size)
     model.eval()
+    # torch >= 2.5 defaults to the dynamo exporter, whose graphs ORT's
+    # quantizer cannot shape-infer; pin the TorchScript exporter where the
+    # choice exists (older torch only has that one).
+    extra = {"dynamo": False} if _HAS_DYNAMO_EXPORT else {}
     torch.onnx.export(
         model,
         dummy,
@@ -273,14 +578,73 @@ def export_onnx(model: ServerScorer, input_size: int, path: Path) -> None:
             "predicted_score": {0: "batch_size"},
         },
         opset_version=14,
+        **extra,
     )
+    if isinstance(model, ScaledServerScorer):
+        # Tells the model server to ignore any scaler.json next to this model.
+        proto = onnx.load(str(path))
+        onnx.helper.set_model_props(proto, {NORMALIZATION_KEY: NORMALIZATION_IN_GRAPH})
+        onnx.save(proto, str(path))
     log.info("ONNX model saved → %s", path)
 
 
-def save_scaler(sc: StandardScaler, path: Path) -> None:
-    data = {"mean": sc.mean_.tolist(), "scale": sc.scale_.tolist()}
-    path.write_text(json.dumps(data))
-    log.info("Scaler saved → %s", path)
+class _CalibrationReader(CalibrationDataReader):
+    """Feeds raw feature rows to ORT's static-quantization calibrator."""
+
+    def __init__(self, X: np.ndarray, batch_size: int = 256) -> None:
+        self._batches = (
+            {"features": X[i : i + batch_size]} for i in range(0, len(X), batch_size)
+        )
+
+    def get_next(self) -> dict | None:
+        return next(self._batches, None)
+
+
+def quantize_onnx(src: Path, dst: Path, calibration: np.ndarray) -> None:
+    """
+    Static int8 quantization of an exported model. Activation scales are
+    fixed from the raw `calibration` rows rather than picked per input
+    tensor, so a server's score never depends on the other rows scored in
+    the same /predict batch.
+
+    Only the Linear layers are quantized. Q/DQ pairs inside LayerNorm stop
+    ORT fusing it into its row-wise kernel, and the unfused ops differ by an
+    ulp between batch sizes, which can flip an int8 rounding step.
+    """
+    quantize_static(
+        str(src),
+        str(dst),
+        _CalibrationReader(np.ascontiguousarray(calibration, dtype=np.float32)),
+        op_types_to_quantize=["Gemm", "MatMul"],
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    log.info(
+        "Quantized ONNX model saved → %s (%.1f KiB → %.1f KiB)",
+        dst,
+        src.stat().st_size / 1024,
+        dst.stat().st_size / 1024,
+    )
+
+
+def publish_model(
+    fp32_path: Path, served_path: Path, calibration: np.ndarray | None = None
+) -> None:
+    """
+    Write the served model: a copy of fp32_path, or, given raw `calibration`
+    features, its int8 quantization. Quantization is an optimisation and must
+    not throw away a finished training run, so a failure falls back to the
+    fp32 copy.
+    """
+    if calibration is None:
+        shutil.copyfile(fp32_path, served_path)
+        log.info("ONNX model published → %s", served_path)
+        return
+    try:
+        quantize_onnx(fp32_path, served_path, calibration)
+    except Exception:
+        log.exception("Quantization failed — serving the fp32 model instead")
+        shutil.copyfile(fp32_path, served_path)
 
 
 def save_feature_manifest(path: Path) -> None:
@@ -292,6 +656,7 @@ def save_feature_manifest(path: Path) -> None:
 
 
 def main() -> None:
+    load_dotenv()
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     df = fetch_training_data()
@@ -302,34 +667,60 @@ def main() -> None:
     feat_df = create_features(df)
     target = calculate_target(df)
 
-    if feat_df.empty or target.empty:
+    X, y = _training_arrays(feat_df, target)
+    if len(X) == 0:
         log.error("Feature engineering produced empty result.")
         sys.exit(1)
 
-    X = feat_df[FEATURES].values
-    y = target.values
-
     log.info("Dataset: %d samples, %d features", len(X), X.shape[1])
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42
     )
 
-    scaler = StandardScaler()
+    # The exported graph takes raw features, so int8 calibration must see
+    # X_train before it is scaled in place below.
+    calibration = X_train.copy() if os.getenv("TRAIN_QUANTIZE_INT8") == "1" else None
+
+    # train_test_split returns fresh arrays, so scaling them in place is safe.
+    scaler = StandardScaler(copy=False)
     X_train = scaler.fit_transform(X_train)
     X_test = scaler.transform(X_test)
 
-    model = train(X_train, y_train, X_test, y_test)
-
-    with torch.no_grad():
-        preds = model(torch.FloatTensor(X_test)).numpy().flatten()
-    mae = mean_absolute_error(y_test, preds)
-    log.info("Test MAE: %.4f ms", mae)
+    # Off by default: compilation takes longer than training on a per-server
+    # dataset this small, and needs a working C++ toolchain.
+    model = train(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        compile_model=os.getenv("TRAIN_TORCH_COMPILE") == "1",
+    )
 
-    save_scaler(scaler, OUTPUT_DIR / "scaler.json")
-    export_onnx(model, X.shape[1], OUTPUT_DIR / "load_balancer.onnx")
+    with torch.inference_mode():
+        preds = model(_tensor(X_test)).numpy().flatten()
+    mae, rmse, max_err = _error_stats(y_test, preds)
+    log.info("Test MAE: %.4f ms, RMSE: %.4f ms, max error: %.4f ms", mae, rmse, max_err)
+
+    # The exported graph is marked as normalising its own inputs, so the model
+    # server ignores scaler.json; drop any copy left by an older run anyway.
+    (OUTPUT_DIR / "scaler.json").unlink(missing_ok=True)
+    fp32_path = OUTPUT_DIR / "load_balancer.fp32.onnx"
+    export_onnx(
+        ScaledServerScorer(model, scaler.mean_, scaler.scale_),
+        X.shape[1],
+        fp32_path,
+    )
+    publish_model(
+        fp32_path,
+        OUTPUT_DIR / "load_balancer.onnx",
+        calibration=calibration,
+    )
     save_feature_manifest(OUTPUT_DIR / "inference_features.json")
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        _close_db_connections()